@@ -19,6 +19,12 @@ const path = require('path');
 const os = require('os');
 const readline = require('readline');
 
+// Resolved once per process: the home directory lookup can hit the passwd
+// database and neither value changes mid-run.
+const HOME_DIR = os.homedir();
+const PLATFORM = os.platform();
+const IS_WINDOWS = PLATFORM === 'win32';
+
 // =====================
 // UI Helper Functions
 // =====================
@@ -65,9 +71,42 @@ function printStep(stepNum, total, message) {
 // Platform Paths
 // =====================
 
+let cachedPlatformPaths = null;
+let cachedPlatformPathsKey = null;
+
+// Expand ~, $VAR and %VAR% in user-supplied paths (e.g. values passed on
+// the command line or stored in the installer config).
+function expandUserPath(p) {
+  let expanded = String(p);
+  if (expanded === '~' || expanded.startsWith('~/') || expanded.startsWith('~\\')) {
+    expanded = path.join(HOME_DIR, expanded.slice(1));
+  }
+  expanded = expanded.replace(/%([^%]+)%/g, (match, name) =>
+    process.env[name] !== undefined ? process.env[name] : match
+  );
+  expanded = expanded.replace(/\$([A-Za-z_][A-Za-z0-9_]*)/g, (match, name) =>
+    process.env[name] !== undefined ? process.env[name] : match
+  );
+  return path.resolve(expanded);
+}
+
 function getPlatformPaths() {
-  const home = os.homedir();
-  const system = os.platform();
+  const home = HOME_DIR;
+  const system = PLATFORM;
+
+  // Only the Windows layout consults APPDATA/USERPROFILE; read them once
+  // here and skip the env lookups entirely on macOS/Linux.
+  const appdata = IS_WINDOWS ? process.env.APPDATA || '' : '';
+  const userprofile = IS_WINDOWS ? process.env.USERPROFILE || '' : '';
+
+  // Memoize: the platform dispatch and path joins only need to happen once
+  // per process. Key on the inputs so a changed environment (APPDATA,
+  // USERPROFILE, home) still produces fresh paths.
+  const cacheKey = [system, appdata, userprofile, home].join('|');
+
+  if (cachedPlatformPaths && cachedPlatformPathsKey === cacheKey) {
+    return cachedPlatformPaths;
+  }
 
   const paths = {
     vscode_user_settings: null,
@@ -78,8 +117,6 @@ function getPlatformPaths() {
   };
 
   if (system === 'win32') {
-    const appdata = process.env.APPDATA || '';
-    const userprofile = process.env.USERPROFILE || '';
     paths.vscode_user_settings = path.join(appdata, 'Code', 'User', 'settings.json');
     paths.claude_desktop = path.join(appdata, 'Claude', 'claude_desktop_config.json');
     paths.claude_code = path.join(userprofile, '.claude.json');
@@ -116,23 +153,88 @@ function getPlatformPaths() {
     paths.cursor = path.join(home, '.cursor', 'mcp.json');
   }
 
-  return paths;
+  // Freeze so callers cannot mutate the shared cached object
+  cachedPlatformPaths = Object.freeze(paths);
+  cachedPlatformPathsKey = cacheKey;
+  return cachedPlatformPaths;
 }
 
 // =====================
 // Low-level Input Functions
 // =====================
 
+// One readline interface shared for the life of the process, created
+// lazily on first use. A fresh interface per prompt loses whatever stdin
+// had already buffered beyond the first line — with piped answers the
+// whole script arrives in one chunk, so per-prompt interfaces discarded
+// every answer after the first. Lines that arrive while no question is
+// pending (readline emits them immediately) are queued in pendingLines
+// and consumed by later prompts. Closed only at process end.
+let sharedReadline = null;
+let stdinEnded = false;
+const pendingLines = [];
+
 function createReadlineInterface() {
-  return readline.createInterface({
-    input: process.stdin,
-    output: process.stdout,
-  });
+  if (!sharedReadline) {
+    sharedReadline = readline.createInterface({
+      input: process.stdin,
+      output: process.stdout,
+    });
+    // Fires only when no question is pending; save the line for the next one
+    sharedReadline.on('line', (line) => {
+      pendingLines.push(line);
+    });
+    sharedReadline.on('close', () => {
+      sharedReadline = null;
+      stdinEnded = true;
+    });
+  }
+  return sharedReadline;
+}
+
+function closeSharedReadline() {
+  if (sharedReadline) {
+    sharedReadline.close();
+  }
+}
+
+function eofExit() {
+  process.stdout.write('\n');
+  printError('Unexpected end of input while waiting for a response');
+  process.exit(1);
 }
 
 function question(rl, query) {
   return new Promise((resolve) => {
-    rl.question(query, resolve);
+    // Answers sent ahead of this prompt (one piped chunk, a fast typist)
+    // were captured by the shared line listener; consume those first.
+    if (pendingLines.length > 0) {
+      process.stdout.write(query + '\n');
+      resolve(pendingLines.shift());
+      return;
+    }
+
+    // Piped input can run out mid-prompt; exiting 0 at that point would
+    // report success for an install that never happened. Treat EOF before
+    // an answer as a hard error instead of silent success.
+    if (stdinEnded) {
+      process.stdout.write(query);
+      eofExit();
+    }
+
+    let answered = false;
+    const onClose = () => {
+      if (!answered) {
+        eofExit();
+      }
+    };
+    rl.once('close', onClose);
+
+    rl.question(query, (answer) => {
+      answered = true;
+      rl.removeListener('close', onClose);
+      resolve(answer);
+    });
   });
 }
 
@@ -198,6 +300,13 @@ function formatPassword(value, showChars = 3) {
 }
 
 function getPassword(rl, prompt) {
+  // Raw mode is unavailable when stdin is a pipe (answers scripted in);
+  // fall back to a plain line read so the installer doesn't crash or
+  // stall waiting on terminal input that never comes.
+  if (!process.stdin.isTTY) {
+    return question(rl, prompt);
+  }
+
   return new Promise((resolve) => {
     process.stdout.write(prompt);
     process.stdin.setRawMode(true);
@@ -304,6 +413,37 @@ function selectMenu(options, prompt, defaultIndex = 0, multiSelect = false) {
       return;
     }
 
+    // Arrow-key navigation needs raw mode; with piped stdin present a
+    // numbered menu and read the answer as a plain line instead.
+    if (!process.stdin.isTTY) {
+      const rl = createReadlineInterface();
+      let content = prompt + '\n';
+      options.forEach((option, index) => {
+        content += `  ${index + 1}) ${option}\n`;
+      });
+      content += multiSelect
+        ? '  Enter numbers separated by spaces (Enter for all): '
+        : `  Enter number (default: ${defaultIndex + 1}): `;
+
+      question(rl, content).then((answer) => {
+        if (multiSelect) {
+          const indices = answer
+            .split(/[\s,]+/)
+            .map((token) => parseInt(token, 10) - 1)
+            .filter((i) => Number.isInteger(i) && i >= 0 && i < options.length);
+          if (indices.length === 0) {
+            resolve(Array.from({ length: options.length }, (_, i) => i));
+          } else {
+            resolve(Array.from(new Set(indices)).sort((a, b) => a - b));
+          }
+        } else {
+          const index = parseInt(answer.trim(), 10) - 1;
+          resolve(index >= 0 && index < options.length ? index : defaultIndex);
+        }
+      });
+      return;
+    }
+
     let selectedIndex = defaultIndex >= 0 && defaultIndex < options.length ? defaultIndex : 0;
     let selectedIndices = multiSelect ? new Set() : null;
     let buffer = '';
@@ -442,31 +582,24 @@ async function confirm({ message, default: defaultVal = false }) {
   const defaultHint = defaultVal ? 'Y/n' : 'y/N';
   const prompt = `  ${message} (${defaultHint}): `;
 
-  return new Promise((resolve) => {
-    const onLine = (line) => {
-      const answer = line.trim().toLowerCase();
-      
-      if (answer === '' || answer === '\n' || answer === '\r') {
-        rl.close();
-        resolve(defaultVal);
-        return;
-      }
+  while (true) {
+    const line = await question(rl, prompt);
+    const answer = line.trim().toLowerCase();
 
-      if (/^(y|yes)$/i.test(answer)) {
-        rl.close();
-        resolve(true);
-      } else if (/^(n|no)$/i.test(answer)) {
-        rl.close();
-        resolve(false);
-      } else {
-        // Invalid input, ask again
-        process.stdout.write(CLEAR_LINE);
-        rl.question(prompt, onLine);
-      }
-    };
+    if (answer === '' || answer === '\n' || answer === '\r') {
+      return defaultVal;
+    }
 
-    rl.question(prompt, onLine);
-  });
+    if (/^(y|yes)$/i.test(answer)) {
+      return true;
+    }
+    if (/^(n|no)$/i.test(answer)) {
+      return false;
+    }
+
+    // Invalid input, ask again
+    process.stdout.write(CLEAR_LINE);
+  }
 }
 
 /**
@@ -490,12 +623,10 @@ async function input({ message, default: defaultVal = '', validate = null }) {
     if (validate) {
       const result = await validate(value);
       if (result === true) {
-        rl.close();
         return value;
       }
       printError(result);
     } else {
-      rl.close();
       return value;
     }
   }
@@ -518,12 +649,10 @@ async function password({ message, mask = '●', validate = null }) {
     if (validate) {
       const result = await validate(value);
       if (result === true) {
-        rl.close();
         return value.trim();
       }
       printError(result);
     } else if (value.trim()) {
-      rl.close();
       return value.trim();
     } else {
       printError('Value cannot be empty. Please try again.');
@@ -583,6 +712,49 @@ async function checkbox({ message, choices = [] }) {
   return selectedIndices.map(i => choices[i].value);
 }
 
+// =====================
+// Shared Prompt Helpers
+// =====================
+
+// Validator factories; every prompt used to hand-roll the same
+// trim-and-check closure inline.
+function requireNonEmpty(label) {
+  return (val) => (val.trim() ? true : `${label} cannot be empty`);
+}
+
+function uniqueServerName(seenNames) {
+  return (val) => {
+    const name = val.trim();
+    if (!name) return 'Server name cannot be empty';
+    if (seenNames.has(name)) return `Server '${val}' already exists`;
+    return true;
+  };
+}
+
+// Common host/token/read-only sequence shared by every "configure a
+// server" flow. `label` personalizes the prompts for multi-server setups.
+async function promptServerFields({ host = 'https://gitlab.com', readonly = false, label = '' } = {}) {
+  const suffix = label ? ` for '${label}'` : '';
+
+  const gitlab_host = await input({
+    message: `GitLab host URL${suffix}`,
+    default: host,
+    validate: requireNonEmpty('Host')
+  });
+
+  const token = await password({
+    message: `GitLab access token${suffix}`,
+    validate: requireNonEmpty('Token')
+  });
+
+  const readonlyVal = await confirm({
+    message: `Enable read-only mode${suffix}?`,
+    default: readonly
+  });
+
+  return { gitlab_host: gitlab_host.trim(), token, readonly: readonlyVal };
+}
+
 // =====================
 // Config Persistence
 // =====================
@@ -660,6 +832,40 @@ async function detectEnvironments() {
 // Read IDE Configurations
 // =====================
 
+// Parsed-config cache for one installer run. ~/.claude.json in particular
+// can grow to many MB of per-project state, and a single run reads it for
+// detection, again for the sync preview, and again for the final update.
+// Cache the parsed value keyed on mtime+size so each file is parsed once.
+const jsonFileCache = new Map();
+
+// Files already rotated to .bak during this run; a file's backup should
+// reflect its state before the installer touched it, not mid-run contents.
+const backedUpThisRun = new Set();
+
+function readJsonFile(filePath) {
+  let stat;
+  try {
+    stat = fs.statSync(filePath);
+  } catch (e) {
+    return null;
+  }
+
+  const key = `${stat.mtimeMs}:${stat.size}`;
+  const cached = jsonFileCache.get(filePath);
+  if (cached && cached.key === key) {
+    return cached.data;
+  }
+
+  try {
+    const data = JSON.parse(fs.readFileSync(filePath, 'utf8'));
+    jsonFileCache.set(filePath, { key, data });
+    return data;
+  } catch (e) {
+    // Ignore parse errors
+    return null;
+  }
+}
+
 function readIdeConfigs() {
   const paths = getPlatformPaths();
   const configs = {
@@ -670,61 +876,33 @@ function readIdeConfigs() {
   };
 
   // Read VS Code config
-  if (paths.vscode_user_settings && fs.existsSync(paths.vscode_user_settings)) {
-    try {
-      const content = fs.readFileSync(paths.vscode_user_settings, 'utf8');
-      const data = JSON.parse(content);
-      configs.vscode = data.mcp?.servers || {};
-    } catch (e) {
-      // Ignore parse errors
-    }
+  const vscodeData = paths.vscode_user_settings ? readJsonFile(paths.vscode_user_settings) : null;
+  if (vscodeData) {
+    configs.vscode = vscodeData.mcp?.servers || {};
   }
 
   // Try workspace config
-  const workspaceConfig = path.join(process.cwd(), paths.vscode_workspace);
-  if (fs.existsSync(workspaceConfig)) {
-    try {
-      const content = fs.readFileSync(workspaceConfig, 'utf8');
-      const data = JSON.parse(content);
-      if (data.servers) {
-        configs.vscode = { ...configs.vscode, ...data.servers };
-      }
-    } catch (e) {
-      // Ignore parse errors
-    }
+  const workspaceData = readJsonFile(path.join(process.cwd(), paths.vscode_workspace));
+  if (workspaceData && workspaceData.servers) {
+    configs.vscode = { ...configs.vscode, ...workspaceData.servers };
   }
 
   // Read Claude Desktop config
-  if (paths.claude_desktop && fs.existsSync(paths.claude_desktop)) {
-    try {
-      const content = fs.readFileSync(paths.claude_desktop, 'utf8');
-      const data = JSON.parse(content);
-      configs.claude_desktop = data.mcpServers || {};
-    } catch (e) {
-      // Ignore parse errors
-    }
+  const claudeDesktopData = paths.claude_desktop ? readJsonFile(paths.claude_desktop) : null;
+  if (claudeDesktopData) {
+    configs.claude_desktop = claudeDesktopData.mcpServers || {};
   }
 
   // Read Claude Code config
-  if (paths.claude_code && fs.existsSync(paths.claude_code)) {
-    try {
-      const content = fs.readFileSync(paths.claude_code, 'utf8');
-      const data = JSON.parse(content);
-      configs.claude_code = data.mcpServers || {};
-    } catch (e) {
-      // Ignore parse errors
-    }
+  const claudeCodeData = paths.claude_code ? readJsonFile(paths.claude_code) : null;
+  if (claudeCodeData) {
+    configs.claude_code = claudeCodeData.mcpServers || {};
   }
 
   // Read Cursor config
-  if (paths.cursor && fs.existsSync(paths.cursor)) {
-    try {
-      const content = fs.readFileSync(paths.cursor, 'utf8');
-      const data = JSON.parse(content);
-      configs.cursor = data.mcpServers || {};
-    } catch (e) {
-      // Ignore parse errors
-    }
+  const cursorData = paths.cursor ? readJsonFile(paths.cursor) : null;
+  if (cursorData) {
+    configs.cursor = cursorData.mcpServers || {};
   }
 
   return configs;
@@ -734,16 +912,30 @@ function readIdeConfigs() {
 // Detect GitLab MCP Servers
 // =====================
 
+// Resolving the local binary (stat + symlink walk) is needed by detection,
+// validation and config generation; memoize it per project root so the
+// syscalls happen once per run instead of once per server.
+const localBinaryCache = new Map();
+
+function resolveLocalBinary(projectRoot) {
+  let resolved = localBinaryCache.get(projectRoot);
+  if (!resolved) {
+    const binaryPath = path.join(projectRoot, 'bin', 'gitlab-mcp-server');
+    const fullBinaryPath = IS_WINDOWS ? `${binaryPath}.exe` : binaryPath;
+    const absBinaryPath = fs.existsSync(fullBinaryPath) ? path.resolve(fullBinaryPath) : null;
+    resolved = { fullBinaryPath, absBinaryPath };
+    localBinaryCache.set(projectRoot, resolved);
+  }
+  return resolved;
+}
+
 function detectGitlabMcpServers(config, ideType, projectRoot) {
   if (!config || typeof config !== 'object') {
     return [];
   }
 
   const detected = [];
-  const binaryPath = path.join(projectRoot, 'bin', 'gitlab-mcp-server');
-  const isWindows = os.platform() === 'win32';
-  const fullBinaryPath = isWindows ? `${binaryPath}.exe` : binaryPath;
-  const absBinaryPath = fs.existsSync(fullBinaryPath) ? path.resolve(fullBinaryPath) : null;
+  const { absBinaryPath } = resolveLocalBinary(projectRoot);
 
   for (const [serverName, serverConfig] of Object.entries(config)) {
     if (!serverConfig || typeof serverConfig !== 'object') {
@@ -818,12 +1010,9 @@ function detectDeploymentMode(servers, projectRoot) {
   }
 
   // Check if it's a local binary path
-  const binaryPath = path.join(projectRoot, 'bin', 'gitlab-mcp-server');
-  const isWindows = os.platform() === 'win32';
-  const fullBinaryPath = isWindows ? `${binaryPath}.exe` : binaryPath;
-  const absBinaryPath = fs.existsSync(fullBinaryPath) ? path.resolve(fullBinaryPath) : null;
+  const { absBinaryPath } = resolveLocalBinary(projectRoot);
 
-  if (absBinaryPath && (fullCommand.includes(absBinaryPath.toLowerCase()) || 
+  if (absBinaryPath && (fullCommand.includes(absBinaryPath.toLowerCase()) ||
       fullCommand.includes(path.basename(absBinaryPath).toLowerCase()))) {
     return 'local';
   }
@@ -849,10 +1038,7 @@ function validateServerConfig(server, deploymentMode, projectRoot) {
 
     if (deploymentMode === 'local') {
       // Check if binary path exists
-      const binaryPath = path.join(projectRoot, 'bin', 'gitlab-mcp-server');
-      const isWindows = os.platform() === 'win32';
-      const fullBinaryPath = isWindows ? `${binaryPath}.exe` : binaryPath;
-      const absBinaryPath = fs.existsSync(fullBinaryPath) ? path.resolve(fullBinaryPath) : null;
+      const { absBinaryPath } = resolveLocalBinary(projectRoot);
 
       if (absBinaryPath && !fullCommand.includes(absBinaryPath) && !fullCommand.includes(path.basename(absBinaryPath))) {
         errors.push('Command path does not match expected binary');
@@ -945,16 +1131,13 @@ async function editServer(server, deploymentMode, projectRoot) {
   const newName = await input({
     message: 'Server name',
     default: server.name,
-    validate: (val) => {
-      if (!val.trim()) return 'Server name cannot be empty';
-      return true;
-    }
+    validate: requireNonEmpty('Server name')
   });
 
   const newHost = await input({
     message: 'GitLab host URL',
     default: server.gitlab_host || 'https://gitlab.com',
-    validate: (val) => val.trim() ? true : 'Host cannot be empty'
+    validate: requireNonEmpty('Host')
   });
 
   const updateToken = await confirm({
@@ -966,7 +1149,7 @@ async function editServer(server, deploymentMode, projectRoot) {
   if (updateToken) {
     newToken = await password({
       message: 'GitLab access token',
-      validate: (val) => val.trim() ? true : 'Token cannot be empty'
+      validate: requireNonEmpty('Token')
     });
   }
 
@@ -1050,36 +1233,14 @@ async function manageServers(servers, deploymentMode, projectRoot) {
         printSection('Add New Server');
         const serverName = await input({
           message: 'Server name (e.g., "work", "personal")',
-          validate: (val) => {
-            if (!val.trim()) return 'Server name cannot be empty';
-            if (servers.some(s => s.name === val.trim())) {
-              return `Server '${val}' already exists`;
-            }
-            return true;
-          }
-        });
-
-        const gitlab_host = await input({
-          message: 'GitLab host URL',
-          default: 'https://gitlab.com',
-          validate: (val) => val.trim() ? true : 'Host cannot be empty'
+          validate: uniqueServerName(new Set(servers.map(s => s.name)))
         });
 
-        const token = await password({
-          message: 'GitLab access token',
-          validate: (val) => val.trim() ? true : 'Token cannot be empty'
-        });
+        const fields = await promptServerFields();
 
-        const readonly = await confirm({
-          message: 'Enable read-only mode?',
-          default: false
-        });
-
-        servers.push({ 
-          name: serverName.trim(), 
-          gitlab_host: gitlab_host.trim(), 
-          token, 
-          readonly,
+        servers.push({
+          name: serverName.trim(),
+          ...fields,
           config: null, // New server, no IDE config
           ideTypes: []
         });
@@ -1192,7 +1353,7 @@ async function manageServers(servers, deploymentMode, projectRoot) {
               printInfo(`Enter token for server: ${server.name}`);
               server.token = await password({
                 message: `  GitLab access token for '${server.name}'`,
-                validate: (val) => val.trim() ? true : 'Token cannot be empty'
+                validate: requireNonEmpty('Token')
               });
               printSuccess(`Token received for '${server.name}'`);
               console.log('');
@@ -1237,31 +1398,13 @@ async function manageServers(servers, deploymentMode, projectRoot) {
 // =====================
 
 async function collectSingleServer(deploymentMode) {
-  const server = {
-    name: 'gitlab'
-  };
-
-  server.gitlab_host = await input({
-    message: 'GitLab host URL',
-    default: 'https://gitlab.com',
-    validate: (val) => val.trim() ? true : 'Host cannot be empty'
-  });
-
-  server.token = await password({
-    message: 'GitLab access token',
-    validate: (val) => val.trim() ? true : 'Token cannot be empty'
-  });
-
-  server.readonly = await confirm({
-    message: 'Enable read-only mode?',
-    default: false
-  });
-
-  return [server];
+  const fields = await promptServerFields();
+  return [{ name: 'gitlab', ...fields }];
 }
 
 async function collectServersNew(deploymentMode) {
   const servers = [];
+  const seenNames = new Set();
   let serverNum = 0;
 
   printSection('Multi-Server Configuration');
@@ -1274,32 +1417,13 @@ async function collectServersNew(deploymentMode) {
 
     const serverName = await input({
       message: `Server name (e.g., 'work', 'personal')`,
-      validate: (val) => {
-        if (!val.trim()) return 'Server name cannot be empty';
-        if (servers.some(s => s.name === val.trim())) {
-          return `Server '${val}' already configured`;
-        }
-        return true;
-      }
+      validate: uniqueServerName(seenNames)
     });
 
-    const gitlab_host = await input({
-      message: `GitLab host URL for '${serverName}'`,
-      default: 'https://gitlab.com',
-      validate: (val) => val.trim() ? true : 'Host cannot be empty'
-    });
-
-    const token = await password({
-      message: `GitLab access token for '${serverName}'`,
-      validate: (val) => val.trim() ? true : 'Token cannot be empty'
-    });
+    const fields = await promptServerFields({ label: serverName });
 
-    const readonly = await confirm({
-      message: `Enable read-only mode for '${serverName}'?`,
-      default: false
-    });
-
-    servers.push({ name: serverName.trim(), gitlab_host: gitlab_host.trim(), token, readonly });
+    seenNames.add(serverName.trim());
+    servers.push({ name: serverName.trim(), ...fields });
     printSuccess(`Server '${serverName}' configured`);
     console.log('');
 
@@ -1319,62 +1443,88 @@ async function collectServersNew(deploymentMode) {
 // Configuration Helpers
 // =====================
 
+let cachedProjectRoot = null;
+
 function getProjectRoot() {
+  if (cachedProjectRoot) {
+    return cachedProjectRoot;
+  }
+
+  // This script lives in scripts/, so the repo root is one level up; a
+  // single go.mod check there replaces the ancestor walk in the common
+  // case. Keep the walk from cwd as a fallback for unusual layouts.
+  const anchorRoot = path.dirname(__dirname);
+  if (fs.existsSync(path.join(anchorRoot, 'go.mod'))) {
+    cachedProjectRoot = anchorRoot;
+    return cachedProjectRoot;
+  }
+
   let currentDir = process.cwd();
   const root = path.parse(currentDir).root;
 
   while (currentDir !== root) {
     const goModPath = path.join(currentDir, 'go.mod');
     if (fs.existsSync(goModPath)) {
-      return currentDir;
+      cachedProjectRoot = currentDir;
+      return cachedProjectRoot;
     }
     currentDir = path.dirname(currentDir);
   }
 
-  return process.cwd();
+  cachedProjectRoot = process.cwd();
+  return cachedProjectRoot;
 }
 
-function getBinaryConfig(mode, projectRoot) {
-  const config = { mode, env: {} };
-
+// Frozen, shareable description of how to launch the server for a given
+// deployment mode. Per-server argv is derived from it via materializeArgs,
+// so nothing here can be mutated by one server and leak into the next.
+function getBinaryTemplate(mode, projectRoot) {
   if (mode === 'docker') {
-    config.docker_image = 'gitlab-mcp-server:latest';
-    config.command = 'docker';
-    config.args = ['run', '-i', '--rm', '-e', 'GITLAB_TOKEN', '-e', 'GITLAB_HOST'];
-    config.args.push(config.docker_image);
-  } else {
-    // local
-    const binaryPath = path.join(projectRoot, 'bin', 'gitlab-mcp-server');
-    const isWindows = os.platform() === 'win32';
-    const fullBinaryPath = isWindows ? `${binaryPath}.exe` : binaryPath;
+    return Object.freeze({
+      mode,
+      command: 'docker',
+      baseArgs: Object.freeze(['run', '-i', '--rm', '-e', 'GITLAB_TOKEN', '-e', 'GITLAB_HOST']),
+      dockerImage: 'gitlab-mcp-server:latest',
+    });
+  }
 
-    if (!fs.existsSync(fullBinaryPath)) {
-      printError(`Binary not found at ${fullBinaryPath}`);
-      console.log('');
-      printInfo('Please run \'make build\' first to build the binary');
-      process.exit(1);
-    }
+  // local
+  const { fullBinaryPath, absBinaryPath } = resolveLocalBinary(projectRoot);
 
-    const absPath = path.resolve(fullBinaryPath);
-    config.command = absPath;
-    config.args = ['stdio'];
+  if (!absBinaryPath) {
+    printError(`Binary not found at ${fullBinaryPath}`);
+    console.log('');
+    printInfo('Please run \'make build\' first to build the binary');
+    process.exit(1);
   }
 
-  return config;
+  return Object.freeze({
+    mode,
+    command: absBinaryPath,
+    baseArgs: Object.freeze(['stdio']),
+    dockerImage: null,
+  });
 }
 
-function createServerConfig(binaryConfig, serverConfigData) {
+function materializeArgs(template, readonly) {
+  if (template.mode !== 'docker') {
+    return [...template.baseArgs];
+  }
+  const args = [...template.baseArgs];
+  if (readonly) {
+    args.push('-e', 'GITLAB_READ_ONLY');
+  }
+  args.push(template.dockerImage);
+  return args;
+}
+
+function createServerConfig(template, serverConfigData) {
   const serverConfig = {
-    command: binaryConfig.command,
-    args: binaryConfig.args,
+    command: template.command,
+    args: materializeArgs(template, serverConfigData.readonly),
     env: {},
   };
 
-  // Copy env from binary config
-  if (binaryConfig.env) {
-    Object.assign(serverConfig.env, binaryConfig.env);
-  }
-
   // Add GitLab-specific environment variables
   serverConfig.env.GITLAB_TOKEN = serverConfigData.token;
   if (serverConfigData.gitlab_host) {
@@ -1388,32 +1538,29 @@ function createServerConfig(binaryConfig, serverConfigData) {
   return serverConfig;
 }
 
-function updateJsonFile(filePath, updateFunc, description) {
-  let data = {};
+function updateJsonFileBatch(filePath, updateFuncs, description) {
+  const existed = fs.existsSync(filePath);
 
-  // Read existing file or create new structure
-  if (fs.existsSync(filePath)) {
-    try {
-      const content = fs.readFileSync(filePath, 'utf8');
-      data = JSON.parse(content);
-    } catch (e) {
-      // Silently handle parse errors - will create new config
-      data = {};
-    }
+  // Read existing file (through the parse cache) or create new structure;
+  // parse errors fall back to a fresh config.
+  const data = (existed && readJsonFile(filePath)) || {};
+
+  // Apply all updates against the single parsed copy
+  const original = JSON.stringify(data);
+  for (const updateFunc of updateFuncs) {
+    updateFunc(data);
   }
 
-  // Create backup if file exists
-  if (fs.existsSync(filePath)) {
-    const backupPath = filePath + '.bak';
-    try {
-      fs.copyFileSync(filePath, backupPath);
-    } catch (e) {
-      // Continue even if backup fails
-    }
+  // Idempotent rerun: if the updates produced identical data (e.g. same
+  // token installed again), skip the backup and write entirely.
+  if (JSON.stringify(data) === original) {
+    console.log(`  = ${description} unchanged`);
+    return true;
   }
 
-  // Apply updates
-  updateFunc(data);
+  // The update funcs mutated the (possibly cached) parsed object, so the
+  // cache entry no longer mirrors the file on disk.
+  jsonFileCache.delete(filePath);
 
   // Create parent directories if needed
   const dir = path.dirname(filePath);
@@ -1421,26 +1568,62 @@ function updateJsonFile(filePath, updateFunc, description) {
     fs.mkdirSync(dir, { recursive: true });
   }
 
-  // Write updated config
+  // Atomic write: new content goes to a temp file first, then the old file
+  // becomes the .bak via a rename (no byte copy) and the temp file is
+  // renamed into place. A failure before the final rename leaves or
+  // restores the original at filePath.
+  // Only the first write to a file in this run takes a backup — later
+  // writes would just be backing up our own in-progress changes.
+  const tmpPath = filePath + '.tmp';
+  const backupPath = filePath + '.bak';
+  const takeBackup = existed && !backedUpThisRun.has(filePath);
+  let movedToBackup = false;
   try {
-    const content = JSON.stringify(data, null, 2) + '\n';
-    fs.writeFileSync(filePath, content, 'utf8');
+    // Serialize once into a single buffer; output stays 2-space indented
+    // with a trailing newline. One write + one fsync makes the payload
+    // durable before the rename publishes it.
+    const payload = Buffer.from(JSON.stringify(data, null, 2) + '\n', 'utf8');
+    const fd = fs.openSync(tmpPath, 'w');
+    try {
+      fs.writeSync(fd, payload);
+      fs.fsyncSync(fd);
+    } finally {
+      fs.closeSync(fd);
+    }
+    if (takeBackup) {
+      fs.renameSync(filePath, backupPath);
+      movedToBackup = true;
+    }
+    fs.renameSync(tmpPath, filePath);
+    // Only record the backup once the new file is actually in place, so a
+    // failed write retried later still backs up the user's original.
+    if (movedToBackup) {
+      backedUpThisRun.add(filePath);
+    }
     return true;
   } catch (e) {
-    // Try to restore backup
-    const backupPath = filePath + '.bak';
-    if (fs.existsSync(backupPath)) {
+    // If the original was already moved aside, put it back before bailing
+    if (movedToBackup) {
       try {
-        fs.copyFileSync(backupPath, filePath);
+        fs.renameSync(backupPath, filePath);
       } catch {
         // Ignore restore errors
       }
     }
+    try {
+      fs.rmSync(tmpPath, { force: true });
+    } catch {
+      // Ignore cleanup errors
+    }
     printError(`Failed to write ${description}: ${e.message}`);
     return false;
   }
 }
 
+function updateJsonFile(filePath, updateFunc, description) {
+  return updateJsonFileBatch(filePath, [updateFunc], description);
+}
+
 function cleanGitlabServers(config, ideType, projectRoot) {
   if (!config || typeof config !== 'object') {
     return config;
@@ -1459,61 +1642,70 @@ function cleanGitlabServers(config, ideType, projectRoot) {
   return cleaned;
 }
 
-function updateVscodeWorkspace(filePath, serverName, serverConfig) {
-  return updateJsonFile(
-    filePath,
-    (data) => {
-      if (!data.servers) {
-        data.servers = {};
-      }
-      data.servers[serverName] = serverConfig;
-    },
-    'VS Code workspace config'
-  );
+// Environment dispatch table: display label, which platform path the config
+// lives at (null = VS Code's workspace/user fallback chain), and whether the
+// target needs the Claude Code "type" field. Adding an environment is a
+// one-line change here instead of a new branch in updateEnvironment.
+const ENV_HANDLERS = {
+  vscode: { label: 'VS Code', pathKey: null, isClaudeCode: false },
+  claude_desktop: { label: 'Claude Desktop', pathKey: 'claude_desktop', isClaudeCode: false },
+  claude_code: { label: 'Claude Code', pathKey: 'claude_code', isClaudeCode: true },
+  cursor: { label: 'Cursor', pathKey: 'cursor', isClaudeCode: false },
+};
+
+function envLabel(env) {
+  const handler = ENV_HANDLERS[env];
+  return handler ? handler.label : env;
 }
 
-function updateVscodeUser(filePath, serverName, serverConfig) {
-  return updateJsonFile(
-    filePath,
-    (data) => {
-      if (!data.mcp) {
-        data.mcp = {};
-      }
-      if (!data.mcp.servers) {
-        data.mcp.servers = {};
-      }
-      data.mcp.servers[serverName] = serverConfig;
-    },
-    'VS Code user settings'
-  );
+// The per-environment helpers below return update(data) callables rather
+// than performing I/O themselves, so updates for several servers targeting
+// the same file can be applied in one read/write via updateJsonFileBatch.
+
+function updateVscodeWorkspace(serverName, serverConfig) {
+  return (data) => {
+    if (!data.servers) {
+      data.servers = {};
+    }
+    data.servers[serverName] = serverConfig;
+  };
 }
 
-function updateClaudeConfig(filePath, serverName, serverConfig, isClaudeCode = false) {
-  return updateJsonFile(
-    filePath,
-    (data) => {
-      if (!data.mcpServers) {
-        data.mcpServers = {};
-      }
+function updateVscodeUser(serverName, serverConfig) {
+  return (data) => {
+    if (!data.mcp) {
+      data.mcp = {};
+    }
+    if (!data.mcp.servers) {
+      data.mcp.servers = {};
+    }
+    data.mcp.servers[serverName] = serverConfig;
+  };
+}
 
-      // Add type field for Claude Code
-      const config = { ...serverConfig };
-      if (isClaudeCode) {
-        config.type = 'stdio';
-      }
+function updateClaudeConfig(serverName, serverConfig, isClaudeCode = false) {
+  return (data) => {
+    if (!data.mcpServers) {
+      data.mcpServers = {};
+    }
 
-      data.mcpServers[serverName] = config;
-    },
-    isClaudeCode ? 'Claude Code config' : 'Claude/Cursor config'
-  );
+    // Add type field for Claude Code
+    const config = { ...serverConfig };
+    if (isClaudeCode) {
+      config.type = 'stdio';
+    }
+
+    data.mcpServers[serverName] = config;
+  };
 }
 
-function updateVscode(paths, serverName, serverConfig) {
+function updateVscode(paths, updates) {
   // Try workspace config first
   if (paths.vscode_workspace) {
     try {
       const workspacePath = path.join(process.cwd(), paths.vscode_workspace);
-      if (updateVscodeWorkspace(workspacePath, serverName, serverConfig)) {
+      const updateFuncs = updates.map(([name, config]) => updateVscodeWorkspace(name, config));
+      if (updateJsonFileBatch(workspacePath, updateFuncs, 'VS Code workspace config')) {
         return true;
       }
     } catch (e) {
@@ -1523,7 +1715,8 @@ function updateVscode(paths, serverName, serverConfig) {
 
   // Fall back to user settings
   if (paths.vscode_user_settings) {
-    return updateVscodeUser(paths.vscode_user_settings, serverName, serverConfig);
+    const updateFuncs = updates.map(([name, config]) => updateVscodeUser(name, config));
+    return updateJsonFileBatch(paths.vscode_user_settings, updateFuncs, 'VS Code user settings');
   }
 
   return false;
@@ -1537,74 +1730,45 @@ function syncToIde(servers, selectedEnvs, deploymentMode, projectRoot) {
   printInfo(`Syncing ${servers.length} server(s) to ${selectedEnvs.length} environment(s)...`);
   console.log('');
 
+  // One immutable launch template for the whole sync
+  const binaryTemplate = getBinaryTemplate(deploymentMode, projectRoot);
+
+  // True only if every selected environment was actually written; scripted
+  // callers rely on this for their exit code.
+  let allSynced = true;
+
   for (const env of selectedEnvs) {
-    const envNameMap = {
-      vscode: 'VS Code',
-      claude_desktop: 'Claude Desktop',
-      claude_code: 'Claude Code',
-      cursor: 'Cursor'
-    };
-    const envName = envNameMap[env] || env;
+    const envName = envLabel(env);
 
     try {
-      // Get binary config
-      const binaryConfig = getBinaryConfig(deploymentMode, projectRoot);
-
       // Clean existing GitLab servers from config
       let existingConfig = {};
       let configPath = null;
 
       if (env === 'vscode') {
         configPath = paths.vscode_user_settings;
-        if (configPath && fs.existsSync(configPath)) {
-          try {
-            const content = fs.readFileSync(configPath, 'utf8');
-            const data = JSON.parse(content);
-            existingConfig = data.mcp?.servers || {};
-          } catch (e) {
-            // Ignore
-          }
-        }
+        const data = configPath ? readJsonFile(configPath) : null;
+        existingConfig = data?.mcp?.servers || {};
         existingConfig = cleanGitlabServers(existingConfig, env, projectRoot);
       } else if (env === 'claude_desktop') {
         configPath = paths.claude_desktop;
-        if (configPath && fs.existsSync(configPath)) {
-          try {
-            const content = fs.readFileSync(configPath, 'utf8');
-            const data = JSON.parse(content);
-            existingConfig = data.mcpServers || {};
-          } catch (e) {
-            // Ignore
-          }
-        }
+        const data = configPath ? readJsonFile(configPath) : null;
+        existingConfig = data?.mcpServers || {};
         existingConfig = cleanGitlabServers(existingConfig, env, projectRoot);
       } else if (env === 'claude_code') {
         configPath = paths.claude_code;
-        if (configPath && fs.existsSync(configPath)) {
-          try {
-            const content = fs.readFileSync(configPath, 'utf8');
-            const data = JSON.parse(content);
-            existingConfig = data.mcpServers || {};
-          } catch (e) {
-            // Ignore
-          }
-        }
+        const data = configPath ? readJsonFile(configPath) : null;
+        existingConfig = data?.mcpServers || {};
         existingConfig = cleanGitlabServers(existingConfig, env, projectRoot);
       } else if (env === 'cursor') {
         configPath = paths.cursor;
-        if (configPath && fs.existsSync(configPath)) {
-          try {
-            const content = fs.readFileSync(configPath, 'utf8');
-            const data = JSON.parse(content);
-            existingConfig = data.mcpServers || {};
-          } catch (e) {
-            // Ignore
-          }
-        }
+        const data = configPath ? readJsonFile(configPath) : null;
+        existingConfig = data?.mcpServers || {};
         existingConfig = cleanGitlabServers(existingConfig, env, projectRoot);
       }
 
       // Add new servers (skip invalid ones)
+      let added = 0;
       for (const serverConfigData of servers) {
         const serverName = serverConfigData.name;
         
@@ -1623,22 +1787,17 @@ function syncToIde(servers, selectedEnvs, deploymentMode, projectRoot) {
           }
         }
         
-        // Add read-only environment variable if needed
-        if (serverConfigData.readonly) {
-          if (deploymentMode === 'docker') {
-            binaryConfig.args.splice(-1, 0, '-e', 'GITLAB_READ_ONLY');
-          }
-          binaryConfig.env.GITLAB_READ_ONLY = 'true';
-        }
-
-        const serverConfig = createServerConfig(binaryConfig, serverConfigData);
+        // materializeArgs/createServerConfig handle read-only per server
+        const serverConfig = createServerConfig(binaryTemplate, serverConfigData);
         existingConfig[serverName] = serverConfig;
+        added++;
       }
 
       // Write updated config
-      if (env === 'vscode') {
-        if (configPath) {
-          updateJsonFile(
+      let written = false;
+      if (configPath) {
+        if (env === 'vscode') {
+          written = updateJsonFile(
             configPath,
             (data) => {
               if (!data.mcp) {
@@ -1648,10 +1807,8 @@ function syncToIde(servers, selectedEnvs, deploymentMode, projectRoot) {
             },
             `${envName} config`
           );
-        }
-      } else {
-        if (configPath) {
-          updateJsonFile(
+        } else {
+          written = updateJsonFile(
             configPath,
             (data) => {
               data.mcpServers = existingConfig;
@@ -1667,55 +1824,53 @@ function syncToIde(servers, selectedEnvs, deploymentMode, projectRoot) {
             `${envName} config`
           );
         }
+      } else {
+        printError(`Failed to sync ${envName}: path not available`);
       }
 
-      printSuccess(`${envName} synchronized`);
+      if (!written) {
+        // updateJsonFile already reported the write error
+        allSynced = false;
+      } else if (servers.length > 0 && added === 0) {
+        printError(`${envName}: every server was skipped, nothing synchronized`);
+        allSynced = false;
+      } else {
+        printSuccess(`${envName} synchronized`);
+      }
     } catch (e) {
       printError(`Failed to sync ${envName}: ${e.message}`);
+      allSynced = false;
     }
   }
 
   console.log('');
+  return allSynced;
 }
 
-function updateEnvironment(env, paths, serverName, serverConfig) {
+function updateEnvironment(env, paths, updates) {
   let success = false;
   let error = null;
+  const handler = ENV_HANDLERS[env];
 
   try {
-    if (env === 'vscode') {
-      success = updateVscode(paths, serverName, serverConfig);
-    } else if (env === 'claude_desktop') {
-      if (paths.claude_desktop) {
-        success = updateClaudeConfig(paths.claude_desktop, serverName, serverConfig, false);
-      } else {
-        error = 'Path not available';
-      }
-    } else if (env === 'claude_code') {
-      if (paths.claude_code) {
-        success = updateClaudeConfig(paths.claude_code, serverName, serverConfig, true);
-      } else {
-        error = 'Path not available';
-      }
-    } else if (env === 'cursor') {
-      if (paths.cursor) {
-        success = updateClaudeConfig(paths.cursor, serverName, serverConfig, false);
-      } else {
-        error = 'Path not available';
-      }
+    if (!handler) {
+      error = 'Unknown environment';
+    } else if (!handler.pathKey) {
+      success = updateVscode(paths, updates);
+    } else if (paths[handler.pathKey]) {
+      const updateFuncs = updates.map(([name, config]) =>
+        updateClaudeConfig(name, config, handler.isClaudeCode)
+      );
+      success = updateJsonFileBatch(paths[handler.pathKey], updateFuncs, `${handler.label} config`);
+    } else {
+      error = 'Path not available';
     }
   } catch (e) {
     error = e.message;
   }
 
   if (success) {
-    const envNameMap = {
-      vscode: 'VS Code',
-      claude_desktop: 'Claude Desktop',
-      claude_code: 'Claude Code',
-      cursor: 'Cursor'
-    };
-    printSuccess(`${envNameMap[env] || env} configured successfully`);
+    printSuccess(`${envLabel(env)} configured successfully`);
     return true;
   } else {
     printError(`Failed to configure ${env}${error ? `: ${error}` : ''}`);
@@ -1723,11 +1878,188 @@ function updateEnvironment(env, paths, serverName, serverConfig) {
   }
 }
 
+// =====================
+// Command-line Arguments
+// =====================
+
+function printUsage() {
+  console.log('Usage: node scripts/install.js [options]');
+  console.log('');
+  console.log('Options:');
+  console.log('  --non-interactive        Run without prompts (for CI / scripted installs)');
+  console.log('  --mode <local|docker>    Deployment mode (default: auto-detect, then local)');
+  console.log('  --name <name>            Server name (default: gitlab)');
+  console.log('  --host <url>             GitLab host URL (default: https://gitlab.com)');
+  console.log('  --token <token>          GitLab access token');
+  console.log('  --token-env <var>        Read the token from this env var (default: GITLAB_TOKEN)');
+  console.log('  --readonly               Enable read-only mode');
+  console.log('  --servers-json <file>    JSON file with an array of server definitions');
+  console.log('                           [{"name", "gitlab_host", "token", "readonly"}, ...]');
+  console.log('  --environments <list>    Comma-separated environments to configure');
+  console.log(`                           (${Object.keys(ENV_HANDLERS).join(', ')}; default: auto-detect)`);
+  console.log('  --help                   Show this help');
+}
+
+function parseArgs(argv) {
+  const options = {
+    nonInteractive: false,
+    mode: null,
+    name: 'gitlab',
+    host: 'https://gitlab.com',
+    token: null,
+    tokenEnv: null,
+    readonly: false,
+    serversJson: null,
+    environments: null,
+    help: false,
+  };
+
+  for (let i = 0; i < argv.length; i++) {
+    const arg = argv[i];
+    const next = () => {
+      i++;
+      if (i >= argv.length) {
+        printError(`Missing value for ${arg}`);
+        process.exit(1);
+      }
+      return argv[i];
+    };
+
+    switch (arg) {
+      case '--non-interactive':
+        options.nonInteractive = true;
+        break;
+      case '--mode':
+        options.mode = next();
+        if (options.mode !== 'local' && options.mode !== 'docker') {
+          printError(`Invalid mode '${options.mode}' (expected local or docker)`);
+          process.exit(1);
+        }
+        break;
+      case '--name':
+        options.name = next();
+        break;
+      case '--host':
+        options.host = next();
+        break;
+      case '--token':
+        options.token = next();
+        break;
+      case '--token-env':
+        options.tokenEnv = next();
+        break;
+      case '--readonly':
+        options.readonly = true;
+        break;
+      case '--servers-json':
+        options.serversJson = next();
+        break;
+      case '--environments':
+        options.environments = next().split(',').map((e) => e.trim()).filter(Boolean);
+        for (const env of options.environments) {
+          if (!ENV_HANDLERS[env]) {
+            printError(`Unknown environment '${env}' (expected one of: ${Object.keys(ENV_HANDLERS).join(', ')})`);
+            process.exit(1);
+          }
+        }
+        break;
+      case '--help':
+      case '-h':
+        options.help = true;
+        break;
+      default:
+        printError(`Unknown option: ${arg}`);
+        printUsage();
+        process.exit(1);
+    }
+  }
+
+  return options;
+}
+
+function buildServersFromArgs(options) {
+  if (options.serversJson) {
+    const serversFile = expandUserPath(options.serversJson);
+    const data = readJsonFile(serversFile);
+    if (!Array.isArray(data)) {
+      printError(`Could not read a server array from ${serversFile}`);
+      process.exit(1);
+    }
+    return data.map((server) => ({
+      name: server.name || 'gitlab',
+      gitlab_host: server.gitlab_host || 'https://gitlab.com',
+      token: server.token || '',
+      readonly: Boolean(server.readonly),
+    }));
+  }
+
+  const token = options.token || process.env[options.tokenEnv || 'GITLAB_TOKEN'] || '';
+  if (!token) {
+    printError(`No token provided (use --token, or set ${options.tokenEnv || 'GITLAB_TOKEN'})`);
+    process.exit(1);
+  }
+
+  return [{
+    name: options.name,
+    gitlab_host: options.host,
+    token,
+    readonly: options.readonly,
+  }];
+}
+
+async function runNonInteractive(options) {
+  const projectRoot = getProjectRoot();
+  const servers = buildServersFromArgs(options);
+
+  let environments = options.environments;
+  if (!environments) {
+    const detected = await detectEnvironments();
+    environments = Object.entries(detected)
+      .filter(([, found]) => found)
+      .map(([env]) => env);
+  }
+  if (environments.length === 0) {
+    printError('No environments detected or specified (use --environments)');
+    process.exit(1);
+  }
+
+  const deploymentMode =
+    options.mode ||
+    detectDeploymentMode(getAllGitlabServers(projectRoot), projectRoot) ||
+    'local';
+
+  const synced = syncToIde(servers, environments, deploymentMode, projectRoot);
+  if (!synced) {
+    printError('Synchronization failed for one or more environments');
+    process.exit(1);
+  }
+
+  saveInstallerConfig({
+    deploymentMode,
+    servers,
+    lastUpdated: new Date().toISOString(),
+  });
+  printSuccess('Configuration saved to .gitlab-mcp-installer.json');
+}
+
 // =====================
 // Main Installation Flow
 // =====================
 
 async function main() {
+  const options = parseArgs(process.argv.slice(2));
+  if (options.help) {
+    printUsage();
+    return;
+  }
+
+  // Scripted installs (CI, Docker build steps) skip every prompt and all
+  // the terminal round-trips that go with them.
+  if (options.nonInteractive) {
+    await runNonInteractive(options);
+    return;
+  }
+
   printHeader();
 
   try {
@@ -1855,6 +2187,9 @@ async function main() {
     printSeparator();
     console.log('');
 
+    // Release stdin so the process can exit
+    closeSharedReadline();
+
   } catch (error) {
     if (error.name === 'ExitPromptError') {
       console.log('\nInstallation cancelled.');